@@ -0,0 +1,427 @@
+# %% ######################################################################
+###                                                                     ###
+###                          Table of Contents                          ###
+###                                                                     ###
+###     0.          Dependent Libraries                                 ###
+###     1.          Variable Initialization                             ###
+###     2.0.        Engine - Pure Python                                ###
+###     2.1.        Engine - NumPy                                      ###
+###     2.2.        Engine - Multi-Process                              ###
+###     2.3.        Benchmark Harness                                   ###
+###     2.4.        Benchmark                                           ###
+###     2.5.        Results                                             ###
+###                                                                     ###
+###########################################################################
+###                                                                     ###
+###     3.0.        Explanation - Benchmark                             ###
+###                                                                     ###
+###########################################################################
+###                                                                     ###
+###     Throughput benchmark of the simulation in game.py.              ###
+###     A game is player 1 against each of player 2's strategies.       ###
+###     Measures games per second, peak memory and per phase timings    ###
+###         of each engine, and saves them as JSON for comparing runs.  ###
+###                                                                     ###
+###########################################################################
+
+
+
+# %% ######################################################################
+###     0.          Dependent Libraries                                 ###
+###########################################################################
+
+import argparse, concurrent.futures, json, platform, random
+import time, tracemalloc
+import numpy as np
+import os
+
+import game
+
+
+
+# %% ######################################################################
+###     1.          Variable Initialization                             ###
+###########################################################################
+
+### Unknown arguments are ignored so the cells still run in a notebook.
+parser = argparse.ArgumentParser()
+parser.add_argument("--num_game", type = int, default = 10 ** 6)
+parser.add_argument("--num_game_python", type = int, default = 10 ** 5)
+parser.add_argument("--estimators", nargs = "+",
+    choices = list(game.simulators.keys()),
+    default = list(game.simulators.keys()))
+parser.add_argument("--chunks", type = int, nargs = "+",
+    default = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6])
+parser.add_argument("--workers", type = int, nargs = "+", default = None)
+parser.add_argument("--repeat", type = int, default = 3)
+parser.add_argument("--output", default = "benchmark.json")
+parser.add_argument("--compare", default = None,
+    help = "Previous benchmark JSON to compare games per second against.")
+args, _ = parser.parse_known_args()
+
+### An antithetic sample plays 2 games, so the Python engine needs 2.
+if (args.num_game < 1):
+    parser.error("--num_game must be at least 1")
+if (args.num_game_python < 2):
+    parser.error("--num_game_python must be at least 2")
+if (min(args.chunks) < 1):
+    parser.error("--chunks must be at least 1")
+if ((args.workers is not None) and (min(args.workers) < 1)):
+    parser.error("--workers must be at least 1")
+if (args.repeat < 1):
+    parser.error("--repeat must be at least 1")
+
+### Engines whose win rates are further than this many standard errors
+###     from game.py are flagged as not simulating the same game.
+max_win_rate_z = 4
+
+p1_threshold = game.p1_threshold
+p2_threshold = game.p2_threshold
+names = list(p2_threshold.keys())
+
+### 1 worker is always measured, as the baseline of the scaling efficiency.
+### By default, so is every core.
+num_core = os.cpu_count() or 1
+if (args.workers is None):
+    workers_all = sorted(set(
+        [2 ** i for i in range(num_core.bit_length())] + [num_core]))
+else:
+    workers_all = sorted(set([1] + args.workers))
+
+
+
+# %% ######################################################################
+###     2.0.        Engine - Pure Python                                ###
+###########################################################################
+
+### Every engine returns the win rates of player 1 against each strategy,
+###     the per phase timings, and the peak memory of its child processes.
+
+def draw_no_closure(threshold):
+    ### game.draw without the nested __draw__ closure,
+    ###     only as a reference for the cost of the closure.
+    draw_val = random.random()
+    if (draw_val <= threshold):
+        draw_val = random.random()
+    return(draw_val)
+
+def engine_python(num_game, estimator):
+    ### The simulation of game.py itself.
+    t0 = time.perf_counter()
+    p2_strategy, _ = game.simulate(estimator, num_game)
+    phases = {"simulate" : time.perf_counter() - t0}
+    return([p2_strategy[k]["wins_p1"] /
+        (p2_strategy[k]["wins_p1"] + p2_strategy[k]["wins_p2"])
+        for k in names], phases, 0)
+
+def profile_python(num_game):
+    ### Times each part of the inner loop of game.simulate_independent
+    ###     on its own.
+    ### The empty loop is the overhead shared by every other phase.
+    p2_strategy = game.new_p2_strategy()
+    thresholds = [p2_threshold[k] for k in names]
+    p1_val, p2_val = 0.5, 0.25
+    phases = {}
+    ###
+    t0 = time.perf_counter()
+    for i in range(num_game):
+        for k in names:
+            pass
+    phases["loop"] = time.perf_counter() - t0
+    ###
+    t0 = time.perf_counter()
+    for i in range(num_game):
+        for k in names:
+            p2_strategy[k]["threshold"]
+    phases["dict_lookup"] = time.perf_counter() - t0
+    ###
+    t0 = time.perf_counter()
+    for i in range(num_game):
+        for threshold in thresholds:
+            game.draw(threshold)
+    phases["draw"] = time.perf_counter() - t0
+    ###
+    t0 = time.perf_counter()
+    for i in range(num_game):
+        for threshold in thresholds:
+            draw_no_closure(threshold)
+    phases["draw_no_closure"] = time.perf_counter() - t0
+    ###
+    t0 = time.perf_counter()
+    for i in range(num_game):
+        for k in names:
+            if (p1_val > p2_val):
+                p2_strategy[k]["wins_p1"] += 1
+            else:
+                p2_strategy[k]["wins_p2"] += 1
+    phases["tally"] = time.perf_counter() - t0
+    ###
+    return(phases)
+
+
+
+# %% ######################################################################
+###     2.1.        Engine - NumPy                                      ###
+###########################################################################
+
+def engine_numpy(num_game, chunk, seed = None):
+    ### Draws chunk games at once, player 1 in column 0.
+    rng = np.random.default_rng(seed)
+    thresholds = np.array([p1_threshold] + [p2_threshold[k] for k in names])
+    wins = np.zeros(len(names), dtype = np.int64)
+    phases = dict.fromkeys(["draw", "compare", "tally"], 0.0)
+    for i in range(0, num_game, chunk):
+        size = min(chunk, num_game - i)
+        t0 = time.perf_counter()
+        u = rng.random((2, size, len(thresholds)))
+        vals = np.where(u[0] <= thresholds, u[1], u[0])
+        t1 = time.perf_counter()
+        beats = vals[:, :1] > vals[:, 1:]
+        t2 = time.perf_counter()
+        wins += beats.sum(axis = 0)
+        t3 = time.perf_counter()
+        phases["draw"] += t1 - t0
+        phases["compare"] += t2 - t1
+        phases["tally"] += t3 - t2
+    return((wins / num_game).tolist(), phases, 0)
+
+
+
+# %% ######################################################################
+###     2.2.        Engine - Multi-Process                              ###
+###########################################################################
+
+def engine_worker(num_game, chunk, seed, trace):
+    ### Runs in a child process, so it traces its own memory.
+    if (trace):
+        tracemalloc.start()
+    win_rate, phases, _ = engine_numpy(num_game, chunk, seed)
+    peak = tracemalloc.get_traced_memory()[1] if (trace) else 0
+    if (trace):
+        tracemalloc.stop()
+    return(win_rate, phases, peak)
+
+def engine_multiprocess(num_game, chunk, workers):
+    ### Splits the games evenly, one independent seed per worker.
+    ### Worker phases are summed, so they are in CPU seconds.
+    shares = [num_game // workers + (i < num_game % workers)
+        for i in range(workers)]
+    seeds = np.random.SeedSequence().spawn(workers)
+    trace = tracemalloc.is_tracing()
+    ###
+    t0 = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers = workers) as executor:
+        results = list(executor.map(engine_worker,
+            shares, [chunk] * workers, seeds, [trace] * workers))
+    t1 = time.perf_counter()
+    win_rate = np.average([r[0] for r in results],
+        axis = 0, weights = shares).tolist()
+    t2 = time.perf_counter()
+    ###
+    phases = {"simulate" : t1 - t0, "reduce" : t2 - t1}
+    for k in results[0][1].keys():
+        phases[f"worker_{k}"] = sum(r[1][k] for r in results)
+    return(win_rate, phases, sum(r[2] for r in results))
+
+
+
+# %% ######################################################################
+###     2.3.        Benchmark Harness                                   ###
+###########################################################################
+
+def measure(variant, engine, num_game, **kwargs):
+    ### Best of args.repeat untraced runs,
+    ###     then 1 traced run for the peak memory.
+    seconds, phases, win_rate = None, None, None
+    for r in range(args.repeat):
+        t0 = time.perf_counter()
+        run_win_rate, run_phases, _ = engine(num_game, **kwargs)
+        run_seconds = time.perf_counter() - t0
+        if ((seconds is None) or (run_seconds < seconds)):
+            seconds, phases, win_rate = run_seconds, run_phases, run_win_rate
+    ###
+    tracemalloc.start()
+    _, _, child_peak = engine(num_game, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1] + child_peak
+    tracemalloc.stop()
+    ###
+    return({
+        "variant" : variant,
+        "engine" : engine.__name__[len("engine_"):],
+        "num_game" : num_game,
+        **kwargs,
+        "seconds" : seconds,
+        "games_per_second" : num_game / seconds,
+        "peak_memory_bytes" : peak,
+        "phases" : phases,
+        "win_rate" : dict(zip(names, win_rate)),
+        })
+
+def check_win_rate(r, r_ref):
+    ### Returns the largest z-score between the win rates of r and r_ref.
+    ### Every engine simulates the same game, so it should be small.
+    z_all = []
+    for k in names:
+        p = r_ref["win_rate"][k]
+        se = (p * (1 - p) * (1 / r["num_game"] + 1 / r_ref["num_game"])) ** 0.5
+        z_all.append(abs(r["win_rate"][k] - p) / se)
+    return(max(z_all))
+
+
+
+# %% ######################################################################
+###     2.4.        Benchmark                                           ###
+###########################################################################
+
+if (__name__ == "__main__"):
+    results = []
+    ###
+    for estimator in args.estimators:
+        results.append(measure(f"python/estimator={estimator}",
+            engine_python, args.num_game_python, estimator = estimator))
+        if (estimator == "independent"):
+            results[-1]["phases"].update(
+                profile_python(args.num_game_python))
+    ###
+    for chunk in args.chunks:
+        results.append(measure(f"numpy/chunk={chunk}",
+            engine_numpy, args.num_game, chunk = chunk))
+    ###
+    ### Scaling efficiency is the speedup over 1 worker, per worker.
+    chunk_mp = max(args.chunks)
+    for workers in workers_all:
+        results.append(measure(f"multiprocess/workers={workers}",
+            engine_multiprocess, args.num_game,
+            chunk = chunk_mp, workers = workers))
+    gps_1 = [r["games_per_second"] for r in results
+        if (r["engine"] == "multiprocess") and (r["workers"] == 1)][0]
+    for r in results:
+        if (r["engine"] == "multiprocess"):
+            r["scaling_efficiency"] = \
+                r["games_per_second"] / (r["workers"] * gps_1)
+    ###
+    ### Every engine is checked against the first game.py run.
+    for r in results[1:]:
+        r["win_rate_z"] = check_win_rate(r, results[0])
+        r["win_rate_match"] = r["win_rate_z"] <= max_win_rate_z
+
+
+
+# %% ######################################################################
+###     2.5.        Results                                             ###
+###########################################################################
+
+if (__name__ == "__main__"):
+    ### Runs are only comparable with the same number of games,
+    ###     repeats and cores.
+    baseline = {}
+    if (args.compare is not None):
+        with open(args.compare) as f:
+            baseline_run = json.load(f)
+        if ((baseline_run["repeat"] != args.repeat) or
+                (baseline_run["cores"] != num_core)):
+            print("\n", " " * 4,
+                f"Not comparing against {args.compare} : "
+                f"{baseline_run['repeat']} repeats on "
+                f"{baseline_run['cores']} cores, versus "
+                f"{args.repeat} repeats on {num_core} cores.",
+                sep = "")
+        else:
+            baseline = {(r["variant"], r["num_game"]) : r["games_per_second"]
+                for r in baseline_run["results"]}
+    ###
+    print("\n", " " * 4,
+        f"{num_core} cores, Python {platform.python_version()}, "
+        f"NumPy {np.__version__}.",
+        "\n",
+        sep = "")
+    for r in results:
+        print(" " * 4,
+            f"{r['variant']} :",
+            sep = "")
+        print(" " * 4,
+            f"Games per second : {r['games_per_second']:,.0f}",
+            sep = "")
+        print(" " * 4,
+            f"Peak memory : {r['peak_memory_bytes'] / 2 ** 10:,.1f} KiB",
+            sep = "")
+        print(" " * 4,
+            "Phases : " + ", ".join(f"{k} {round(v, 4)} s"
+                for (k, v) in r["phases"].items()),
+            sep = "")
+        if ("scaling_efficiency" in r.keys()):
+            print(" " * 4,
+                f"Scaling efficiency : "
+                f"{round(100 * r['scaling_efficiency'], 2)} %"
+                + (f" (more workers than {num_core} cores)"
+                    if (r["workers"] > num_core) else ""),
+                sep = "")
+        if ("win_rate_z" in r.keys()):
+            print(" " * 4,
+                f"Win rates versus {results[0]['variant']} : "
+                f"max z-score {round(r['win_rate_z'], 2)}"
+                + ("" if (r["win_rate_match"])
+                    else " (NOT the same game as game.py)"),
+                sep = "")
+        key = (r["variant"], r["num_game"])
+        if (key in baseline.keys()):
+            print(" " * 4,
+                f"Versus {args.compare} : "
+                f"{round(r['games_per_second'] / baseline[key], 2)}x",
+                sep = "")
+        elif (args.compare is not None):
+            print(" " * 4,
+                f"Versus {args.compare} : "
+                f"no run of {r['num_game']:,} games",
+                sep = "")
+        print()
+    ###
+    with open(args.output, "w") as f:
+        json.dump({
+            "timestamp" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform" : platform.platform(),
+            "python" : platform.python_version(),
+            "numpy" : np.__version__,
+            "cores" : num_core,
+            "repeat" : args.repeat,
+            "results" : results,
+            }, f, indent = 4)
+
+
+
+###########################################################################
+
+
+
+# %% ######################################################################
+###     3.0.        Explanation - Benchmark                             ###
+###########################################################################
+
+### python : game.simulate, one game at a time, for each estimator.
+###     It calls the code in game.py, so a regression there shows up here.
+### numpy : chunk games drawn and compared as arrays.
+### multiprocess : the numpy engine split across worker processes.
+###     The benchmark is guarded by __main__ so the workers can import
+###         this file without running it.
+
+### The pure Python phases are timed in separate loops,
+###     each of num_game_python * 4 iterations.
+### Subtract the empty loop from a phase for its own cost.
+### draw versus draw_no_closure is the cost of the __draw__ closure.
+
+### Each engine's win rates are checked against the first game.py run,
+###     within max_win_rate_z standard errors, and stored in the JSON.
+
+### --compare matches each variant and number of games against a
+###     previous run, and is skipped when the repeats or cores differ.
+
+### Multi-process timings include starting the worker processes,
+###     which dominates for small num_game.
+### A scaling efficiency of 100 % is a linear speedup.
+### Beyond the number of cores, the efficiency can only fall.
+
+### Peak memory is traced with tracemalloc in a separate run,
+###     as tracing slows down the pure Python engine.
+### For multiprocess, it is the sum of the peaks of the parent
+###     and the workers.
@@ -5,14 +5,16 @@
 ###     0.          Dependent Libraries                                 ###
 ###     1.          Variable Initialization                             ###
 ###     2.0.        Draw Simulation                                     ###
-###     2.1.        Game Simulation                                     ###
-###     2.2.        Results                                             ###
+###     2.1.        Estimator Simulation                                ###
+###     2.2.        Game Simulation                                     ###
+###     2.3.        Results                                             ###
 ###                                                                     ###
 ###########################################################################
 ###                                                                     ###
 ###     3.0.        Explanation - Function                              ###
 ###     3.1.        Explanation - Optimization                          ###
 ###     3.2.        Explanation - Suboptimization                       ###
+###     3.3.        Explanation - Variance Reduction                    ###
 ###                                                                     ###
 ###########################################################################
 ###                                                                     ###
@@ -33,6 +35,7 @@
 ###     0.          Dependent Libraries                                 ###
 ###########################################################################
 
+import argparse
 import random
 import os, sys
 import scipy.stats
@@ -43,19 +46,23 @@ import scipy.stats
 ###     1.          Variable Initialization                             ###
 ###########################################################################
 
+### Unknown arguments are ignored so the cells still run in a notebook.
+parser = argparse.ArgumentParser()
+parser.add_argument("--estimator",
+    choices = ["independent", "common", "antithetic", "control"],
+    default = "independent")
+args, _ = parser.parse_known_args()
+
 num_game = 10 ** 6
 p1_threshold = 0.45
+estimator = args.estimator
 
 data_dir = os.getcwd()
-p2_strategy = {}
+p2_threshold = {}
 for k in ["naive", "greedy", "intuitive", "optimal"]:
-    p2_threshold = \
+    p2_threshold[k] = \
         eval(open(os.path.join(data_dir, f"strategy_{k}.txt")).read())
-    p2_strategy[k] = {
-        "threshold" : p2_threshold,
-        "wins_p1" : 0,
-        "wins_p2" : 0,
-        }
+p2_reference = "optimal"
 
 
 
@@ -75,56 +82,224 @@ def draw(threshold):
     ###
     return(draw_val)
 
+def draw_given(threshold, u):
+    ### Same as draw, from the pre-drawn uniform pair u.
+    draw_val = u[0]
+    if (draw_val <= threshold):
+        draw_val = u[1]
+    return(draw_val)
+
+def expected_draw(threshold):
+    ### f(p), the expected draw value given a threshold p.
+    ### See 3.0. Explanation - Function.
+    return(- (threshold ** 2 - threshold - 1) / 2)
+
+
+
+# %% ######################################################################
+###     2.1.        Estimator Simulation                                ###
+###########################################################################
+
+def new_p2_strategy():
+    ### Returns player 2's strategies with empty win counts.
+    p2_strategy = {}
+    for k in p2_threshold.keys():
+        p2_strategy[k] = {
+            "threshold" : p2_threshold[k],
+            "wins_p1" : 0,
+            "wins_p2" : 0,
+            ### The control variate has a known mean of 0,
+            ###     once the known difference in expected draws is taken out.
+            "control_mean" :
+                expected_draw(p1_threshold) - expected_draw(p2_threshold[k]),
+            ### Running sums of the per sample win rate y,
+            ###     the control variate c, and y against the reference y.
+            "sum_y" : 0,
+            "sum_yy" : 0,
+            "sum_c" : 0,
+            "sum_cc" : 0,
+            "sum_yc" : 0,
+            "sum_yr" : 0,
+            }
+    return(p2_strategy)
+
+### Each estimator has its own loop, so that the independent estimator
+###     pays nothing for the others.
+def simulate_independent(p2_strategy, num_sample):
+    for i in range(num_sample):
+        p1_val = draw(p1_threshold)
+        for k in p2_strategy.keys():
+            p2_val = draw(p2_strategy[k]["threshold"])
+            if (p1_val > p2_val):
+                p2_strategy[k]["wins_p1"] += 1
+            else:
+                p2_strategy[k]["wins_p2"] += 1
+    return
+
+def simulate_common(p2_strategy, num_sample):
+    for i in range(num_sample):
+        p1_val = draw(p1_threshold)
+        u = (random.random(), random.random())
+        win_ref = p1_val > \
+            draw_given(p2_strategy[p2_reference]["threshold"], u)
+        for k in p2_strategy.keys():
+            p2_val = draw_given(p2_strategy[k]["threshold"], u)
+            if (p1_val > p2_val):
+                p2_strategy[k]["wins_p1"] += 1
+                p2_strategy[k]["sum_yr"] += win_ref
+            else:
+                p2_strategy[k]["wins_p2"] += 1
+    return
+
+def simulate_antithetic(p2_strategy, num_sample):
+    for i in range(num_sample):
+        u = (random.random(), random.random())
+        p1_val = draw_given(p1_threshold, u)
+        p1_val_anti = draw_given(p1_threshold, (1 - u[0], 1 - u[1]))
+        for k in p2_strategy.keys():
+            u = (random.random(), random.random())
+            wins = \
+                (p1_val > draw_given(p2_strategy[k]["threshold"], u)) + \
+                (p1_val_anti > draw_given(p2_strategy[k]["threshold"],
+                    (1 - u[0], 1 - u[1])))
+            p2_strategy[k]["wins_p1"] += wins
+            p2_strategy[k]["wins_p2"] += 2 - wins
+            p2_strategy[k]["sum_yy"] += wins * wins
+    return
+
+def simulate_control(p2_strategy, num_sample):
+    for i in range(num_sample):
+        p1_val = draw(p1_threshold)
+        for s in p2_strategy.values():
+            p2_val = draw(s["threshold"])
+            c = p1_val - p2_val - s["control_mean"]
+            s["sum_c"] += c
+            s["sum_cc"] += c * c
+            if (p1_val > p2_val):
+                s["wins_p1"] += 1
+                s["sum_yc"] += c
+            else:
+                s["wins_p2"] += 1
+    return
+
+simulators = {
+    "independent" : simulate_independent,
+    "common" : simulate_common,
+    "antithetic" : simulate_antithetic,
+    "control" : simulate_control,
+    }
+
 
 
 # %% ######################################################################
-###     2.1.        Game Simulation                                     ###
+###     2.2.        Game Simulation                                     ###
 ###########################################################################
 
-for i in range(num_game):
-    p1_val = draw(p1_threshold)
+def simulate(estimator, num_game):
+    ### Returns player 2's strategies with their wins and running sums,
+    ###     and the number of samples behind them.
+    ### An antithetic sample plays 2 games.
+    p2_strategy = new_p2_strategy()
+    if (estimator == "antithetic"):
+        num_sample = num_game // 2
+    else:
+        num_sample = num_game
+    simulators[estimator](p2_strategy, num_sample)
+    ###
+    ### y is a win indicator, so its sums follow from the wins,
+    ###     except for antithetic, where y is the average of 2 games.
     for k in p2_strategy.keys():
-        p2_val = draw(p2_strategy[k]["threshold"])
-        if (p1_val > p2_val):
-            p2_strategy[k]["wins_p1"] += 1
+        if (estimator == "antithetic"):
+            p2_strategy[k]["sum_y"] = p2_strategy[k]["wins_p1"] / 2
+            p2_strategy[k]["sum_yy"] = p2_strategy[k]["sum_yy"] / 4
         else:
-            p2_strategy[k]["wins_p2"] += 1
+            p2_strategy[k]["sum_y"] = p2_strategy[k]["wins_p1"]
+            p2_strategy[k]["sum_yy"] = p2_strategy[k]["wins_p1"]
+    return(p2_strategy, num_sample)
+
+### Guarded so that benchmark.py can import the simulation.
+if (__name__ == "__main__"):
+    p2_strategy, num_sample = simulate(estimator, num_game)
 
 
 
 # %% ######################################################################
-###     2.2.        Results                                             ###
+###     2.3.        Results                                             ###
 ###########################################################################
 
-var = 0.5 * (1 - 0.5)
-sum_var = num_game * var
-std = sum_var ** 0.5
-expected = num_game * 0.5
-print("\n", " " * 4,
-    f"Player 1 has a threshold of {p1_threshold}.",
-    "\n", " " * 4,
-    f"Simulate {num_game:,} games against each of player 2's strategies.",
-    "\n",
-    sep = "")
-for k in p2_strategy.keys():
-    z_score = (p2_strategy[k]['wins_p1'] - expected) / std
-    p_val = scipy.stats.norm.cdf(z_score)
-    print(" " * 4,
-        f"Against {k} strategy:",
-        sep = "")
-    print(" " * 4,
-        f"Win  : {round(100 * p2_strategy[k]['wins_p1'] / num_game, 4)} %",
-        sep = "")
-    print(" " * 4,
-        f"Lose : {round(100 * p2_strategy[k]['wins_p2'] / num_game, 4)} %",
-        sep = "")
-    print(" " * 4,
-        f"Z-score : {round(z_score, 2)}",
-        sep = "")
-    print(" " * 4,
-        f"Probability of having a winning strategy : {round(100 * p_val, 2)} %",
+def estimate(k):
+    ### Returns the estimated win rate of player 1 against strategy k,
+    ###     and the sample variance of its per sample values.
+    s = p2_strategy[k]
+    mean_y = s["sum_y"] / num_sample
+    var_y = s["sum_yy"] / num_sample - mean_y ** 2
+    if (estimator != "control"):
+        return(mean_y, var_y)
+    mean_c = s["sum_c"] / num_sample
+    var_c = s["sum_cc"] / num_sample - mean_c ** 2
+    cov_yc = s["sum_yc"] / num_sample - mean_y * mean_c
+    beta = cov_yc / var_c
+    return(mean_y - beta * mean_c, var_y - beta * cov_yc)
+
+if (__name__ == "__main__"):
+    num_played = p2_strategy[p2_reference]["wins_p1"] + \
+        p2_strategy[p2_reference]["wins_p2"]
+    print("\n", " " * 4,
+        f"Player 1 has a threshold of {p1_threshold}.",
+        "\n", " " * 4,
+        f"Simulate {num_played:,} games against each of player 2's strategies.",
+        "\n", " " * 4,
+        f"Estimator : {estimator}",
         "\n",
         sep = "")
+    for k in p2_strategy.keys():
+        win_rate, var_sample = estimate(k)
+        var_win_rate = var_sample / num_sample
+        z_score = (win_rate - 0.5) / var_win_rate ** 0.5
+        p_val = scipy.stats.norm.cdf(z_score)
+        print(" " * 4,
+            f"Against {k} strategy:",
+            sep = "")
+        print(" " * 4,
+            f"Win  : {round(100 * win_rate, 4)} %",
+            sep = "")
+        print(" " * 4,
+            f"Lose : {round(100 * (1 - win_rate), 4)} %",
+            sep = "")
+        print(" " * 4,
+            f"Standard error : {round(100 * var_win_rate ** 0.5, 4)} %",
+            sep = "")
+        ###
+        ### Variance reduction factor against independent draws,
+        ###     for the same number of games.
+        ### Independent and common draws leave a single win rate as noisy.
+        if (estimator in ["antithetic", "control"]):
+            var_independent = win_rate * (1 - win_rate) / num_played
+            print(" " * 4,
+                f"Variance reduction factor : "
+                f"{round(var_independent / var_win_rate, 2)}",
+                sep = "")
+        ###
+        ### Common random numbers pay off in the comparison between strategies.
+        if ((estimator == "common") and (k != p2_reference)):
+            ref_rate, _ = estimate(p2_reference)
+            s = p2_strategy[k]
+            s_ref = p2_strategy[p2_reference]
+            var_diff = (s["sum_yy"] - 2 * s["sum_yr"] + s_ref["sum_yy"]) / \
+                num_sample - (win_rate - ref_rate) ** 2
+            var_diff_independent = (win_rate * (1 - win_rate) +
+                ref_rate * (1 - ref_rate)) / num_played
+            print(" " * 4,
+                f"Variance reduction factor versus {p2_reference} : "
+                f"{round(var_diff_independent / (var_diff / num_sample), 2)}",
+                sep = "")
+        print(" " * 4,
+            f"Z-score : {round(z_score, 2)}",
+            sep = "")
+        print(" " * 4,
+            f"Probability of having a winning strategy : {round(100 * p_val, 2)} %",
+            "\n",
+            sep = "")
 
 
 
@@ -183,3 +358,25 @@ for k in p2_strategy.keys():
 ### The two are correlated, but not substitutable.
 
 ### Extended exercise : how would this strategy change with more players?
+
+
+
+# %% ######################################################################
+###     3.3.        Explanation - Variance Reduction                    ###
+###########################################################################
+
+### Each estimator is selected with --estimator.
+
+### independent : fresh draws per strategy, the baseline.
+### common : player 2's strategies share the same uniforms.
+###     Individual win rates are as noisy as before,
+###     but the differences between strategies are much less noisy.
+### antithetic : every game is paired with its mirror, u -> 1 - u.
+###     A high draw in one game is a low draw in its mirror,
+###     so the pair's wins are negatively correlated.
+### control : the draw difference has a known mean of f(p1) - f(p2).
+###     The win rate is regressed on it, and the known mean plugged in.
+
+### The variance reduction factor is the variance of the independent
+###     estimator over the variance achieved, for the same number of games.
+### A factor of 2 halves the games needed for the same confidence interval.
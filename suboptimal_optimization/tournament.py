@@ -0,0 +1,229 @@
+# %% ######################################################################
+###                                                                     ###
+###                          Table of Contents                          ###
+###                                                                     ###
+###     0.          Dependent Libraries                                 ###
+###     1.          Variable Initialization                             ###
+###     2.0.        Draw Simulation                                     ###
+###     2.1.        Tournament Simulation                               ###
+###     2.2.        Results                                             ###
+###     2.3.        Output                                              ###
+###                                                                     ###
+###########################################################################
+###                                                                     ###
+###     3.0.        Explanation - Tournament                            ###
+###                                                                     ###
+###########################################################################
+###                                                                     ###
+###     Round-robin tournament of the game in game.py.                  ###
+###     Every strategy_*.txt, and every threshold given on the          ###
+###         command line, plays against every other strategy.           ###
+###     Outputs the pairwise win rate matrix, with standard errors,     ###
+###         and the ranking of the strategies.                          ###
+###                                                                     ###
+###########################################################################
+
+
+
+# %% ######################################################################
+###     0.          Dependent Libraries                                 ###
+###########################################################################
+
+import argparse, csv, fractions, glob, json
+import numpy as np
+import os
+
+
+
+# %% ######################################################################
+###     1.          Variable Initialization                             ###
+###########################################################################
+
+### Unknown arguments are ignored so the cells still run in a notebook.
+parser = argparse.ArgumentParser()
+parser.add_argument("thresholds", nargs = "*",
+    help = "Additional thresholds, ex : 0.45 or 3/5.")
+parser.add_argument("--num_game", type = int, default = 10 ** 6)
+parser.add_argument("--chunk", type = int, default = 10 ** 5)
+parser.add_argument("--seed", type = int, default = None)
+parser.add_argument("--output", default = "tournament")
+args, _ = parser.parse_known_args()
+
+### The score's standard error divides by num_game - 1.
+if (args.num_game < 2):
+    parser.error("--num_game must be at least 2")
+if (args.chunk < 1):
+    parser.error("--chunk must be at least 1")
+
+num_game = args.num_game
+num_chunk = args.chunk
+rng = np.random.default_rng(args.seed)
+
+data_dir = os.getcwd()
+strategy = {}
+for path in sorted(glob.glob(os.path.join(data_dir, "strategy_*.txt"))):
+    k = os.path.basename(path)[len("strategy_"):-len(".txt")]
+    strategy[k] = eval(open(path).read())
+for threshold in args.thresholds:
+    if (threshold in strategy.keys()):
+        parser.error(f"duplicate strategy {threshold}")
+    try:
+        strategy[threshold] = float(fractions.Fraction(threshold))
+    except (ValueError, ZeroDivisionError):
+        parser.error(f"invalid threshold {threshold}")
+for k in strategy.keys():
+    if (not (0 <= strategy[k] <= 1)):
+        parser.error(f"threshold of {k} is {strategy[k]}, not in [0, 1]")
+if (len(strategy) < 2):
+    parser.error("specify at least 2 strategies")
+
+names = list(strategy.keys())
+thresholds = np.array([strategy[k] for k in names], dtype = float)
+num_strategy = len(names)
+
+
+
+# %% ######################################################################
+###     2.0.        Draw Simulation                                     ###
+###########################################################################
+
+def draw(thresholds, size):
+    ### Returns a (size, number of thresholds) array of draws,
+    ###     one draw per threshold per game.
+    ### Same rule as game.py : redraw once at or below the threshold.
+    u = rng.random((2, size, len(thresholds)))
+    return(np.where(u[0] <= thresholds, u[1], u[0]))
+
+
+
+# %% ######################################################################
+###     2.1.        Tournament Simulation                               ###
+###########################################################################
+
+### wins[i, j] counts the games strategy i won against strategy j.
+### score is the fraction of opponents beaten in a game.
+wins = np.zeros((num_strategy, num_strategy), dtype = np.int64)
+sum_score = np.zeros(num_strategy)
+sum_score_sq = np.zeros(num_strategy)
+
+for i in range(0, num_game, num_chunk):
+    vals = draw(thresholds, min(num_chunk, num_game - i))
+    beats = vals[:, :, None] > vals[:, None, :]
+    wins += beats.sum(axis = 0)
+    score = beats.sum(axis = 2) / (num_strategy - 1)
+    sum_score += score.sum(axis = 0)
+    sum_score_sq += (score ** 2).sum(axis = 0)
+
+
+
+# %% ######################################################################
+###     2.2.        Results                                             ###
+###########################################################################
+
+### A strategy against itself is the same draw, so it is left undefined.
+win_rate = wins / num_game
+std_err = np.sqrt(win_rate * (1 - win_rate) / num_game)
+np.fill_diagonal(win_rate, np.nan)
+np.fill_diagonal(std_err, np.nan)
+
+### Pairs within a game share draws, so the score's standard error
+###     comes from the per game scores rather than the matrix.
+### Rounding can leave the variance a hair below 0 for few games.
+score = sum_score / num_game
+score_std_err = np.sqrt(np.maximum(
+    (sum_score_sq / num_game - score ** 2) / (num_game - 1), 0))
+ranking = sorted(range(num_strategy), key = lambda i : - score[i])
+
+width = max(len(k) for k in names) + 2
+print("\n", " " * 4,
+    f"Simulate {num_game:,} games between each pair of "
+    f"{num_strategy} strategies.",
+    "\n", " " * 4,
+    "Win rate of the row strategy against the column strategy :",
+    "\n",
+    sep = "")
+print(" " * 4, " " * width,
+    "".join(f"{k:>{width}}" for k in names),
+    sep = "")
+for i in range(num_strategy):
+    print(" " * 4, f"{names[i]:<{width}}",
+        "".join(f"{'-':>{width}}" if (i == j)
+            else f"{round(100 * win_rate[i, j], 2):>{width - 2}} %"
+            for j in range(num_strategy)),
+        sep = "")
+print("\n", " " * 4,
+    "Ranking by average win rate :",
+    sep = "")
+for rank, i in enumerate(ranking, 1):
+    print(" " * 4,
+        f"{rank}. {names[i]} ({thresholds[i]:.4f}) : "
+        f"{round(100 * score[i], 4)} % ± {round(100 * score_std_err[i], 4)} %",
+        sep = "")
+print()
+
+
+
+# %% ######################################################################
+###     2.3.        Output                                              ###
+###########################################################################
+
+def nan_to_none(x):
+    ### JSON has no NaN.
+    return(None if (np.isnan(x)) else float(x))
+
+with open(f"{args.output}_matrix.csv", "w", newline = "") as f:
+    writer = csv.writer(f)
+    writer.writerow(["strategy", "opponent", "win_rate", "std_err"])
+    for i in range(num_strategy):
+        for j in range(num_strategy):
+            if (i == j):
+                continue
+            writer.writerow([names[i], names[j],
+                win_rate[i, j], std_err[i, j]])
+
+with open(f"{args.output}_ranking.csv", "w", newline = "") as f:
+    writer = csv.writer(f)
+    writer.writerow(["rank", "strategy", "threshold", "score", "std_err"])
+    for rank, i in enumerate(ranking, 1):
+        writer.writerow([rank, names[i], thresholds[i],
+            score[i], score_std_err[i]])
+
+with open(f"{args.output}.json", "w") as f:
+    json.dump({
+        "num_game" : num_game,
+        "strategies" : {k : float(strategy[k]) for k in names},
+        "win_rate" : {names[i] : {names[j] : nan_to_none(win_rate[i, j])
+            for j in range(num_strategy)} for i in range(num_strategy)},
+        "std_err" : {names[i] : {names[j] : nan_to_none(std_err[i, j])
+            for j in range(num_strategy)} for i in range(num_strategy)},
+        "ranking" : [{
+            "strategy" : names[i],
+            "threshold" : float(thresholds[i]),
+            "score" : float(score[i]),
+            "std_err" : float(score_std_err[i]),
+            } for i in ranking],
+        }, f, indent = 4)
+
+
+
+###########################################################################
+
+
+
+# %% ######################################################################
+###     3.0.        Explanation - Tournament                            ###
+###########################################################################
+
+### Each strategy draws once per game, and that draw is reused
+###     against every other strategy in the same game.
+### The number of draws grows linearly with the number of strategies,
+###     rather than with the number of pairs.
+### The comparisons still grow with the number of pairs,
+###     but they are a single vectorized step per chunk of games.
+
+### The games are simulated in chunks of --chunk games,
+###     so memory is bounded by chunk * strategies^2 booleans.
+
+### The score of a strategy is its average win rate over its opponents.
+### With exactly 2 players, win rate is not transitive in general,
+###     so the ranking is a summary, not a proof of dominance.